@@ -4,24 +4,34 @@ EcoMeal AI Backend - FastAPI server for recipe recommendations and eco-friendly
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+import numpy as np
+import orjson
 import google.generativeai as genai
-import pandas as pd
+from google.api_core import exceptions as google_exceptions
 import os
+import random
+import re
+import sqlite3
 from datetime import datetime
-from typing import List, Optional
-import json
+import time
+from typing import List, Literal, Optional
+import asyncio
+import hashlib
+import uuid
+import zlib
 
 # Initialize FastAPI app
-app = FastAPI(title="EcoMeal AI", version="1.0.0")
+app = FastAPI(title="EcoMeal AI", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware to allow frontend requests
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # React dev server
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],  # exact list, so preflights get a fixed response
+    allow_headers=["Content-Type"],
 )
 
 # Configure Google Gemini API
@@ -30,8 +40,149 @@ from dotenv import load_dotenv
 load_dotenv("config.env")
 genai.configure(api_key=os.getenv("GEMINI_API_KEY", "your-api-key-here"))
 
-# Initialize the Gemini model
-model = genai.GenerativeModel('gemini-pro')
+# Initialize the Gemini model; JSON response mode means the model returns
+# valid JSON directly so the decode-fallback path is rarely taken
+model = genai.GenerativeModel(
+    'gemini-1.5-flash',
+    generation_config={"response_mime_type": "application/json"}
+)
+
+# Prompt templates built once at import time; handlers only fill in the
+# per-request fields instead of reassembling the whole prompt each call
+RECIPE_PROMPT_TEMPLATE = """
+    Create a delicious recipe using these leftover ingredients: {ingredients}{dietary_pref}
+
+    Please provide the response in the following JSON format:
+    {{
+        "recipe_name": "Creative recipe name",
+        "ingredients": ["list", "of", "ingredients", "needed"],
+        "instructions": ["step", "by", "step", "instructions"],
+        "calories": estimated_calories_per_serving,
+        "prep_time": "X minutes",
+        "difficulty": "Easy/Medium/Hard"
+    }}
+
+    Make it eco-friendly and sustainable. Focus on reducing food waste and using all ingredients efficiently.
+    """
+
+# The menu prompt has a single insertion point, so it is kept as static
+# prefix/suffix constants and built by concatenation — no .format() scan
+MENU_PROMPT_PREFIX = """
+    Analyze this restaurant menu for eco-friendliness and sustainability: """
+
+MENU_PROMPT_SUFFIX = """
+
+    Please provide the response in the following JSON format:
+    {
+        "eco_analysis": "Overall analysis of the menu's environmental impact",
+        "recommendations": ["list", "of", "eco-friendly", "recommendations"],
+        "overall_eco_score": "green/yellow/red",
+        "menu_items_analysis": [
+            {"item": "menu item name", "eco_rating": "green/yellow/red", "suggestion": "improvement suggestion"},
+            {"item": "another item", "eco_rating": "green/yellow/red", "suggestion": "improvement suggestion"}
+        ]
+    }
+
+    Focus on:
+    - Local and seasonal ingredients
+    - Plant-based options
+    - Sustainable protein sources
+    - Food waste reduction
+    - Packaging and preparation methods
+    """
+
+# Static pieces of the JSON-decode fallbacks, built once instead of per failure
+FALLBACK_PANTRY = ["salt", "pepper", "olive oil"]
+FALLBACK_INSTRUCTIONS = ["Combine all ingredients", "Cook until done", "Season to taste"]
+FALLBACK_ECO_ANALYSIS = "Menu analysis completed. Consider adding more plant-based options and local ingredients."
+FALLBACK_RECOMMENDATIONS = [
+    "Add more plant-based options",
+    "Source ingredients locally",
+    "Reduce food waste through better planning",
+    "Use sustainable packaging"
+]
+
+def fallback_recipe(ingredients_str: str, ingredients: List[str]) -> dict:
+    """Fallback recipe used when the Gemini response isn't valid JSON"""
+    return {
+        "recipe_name": f"Leftover {ingredients_str} Recipe",
+        "ingredients": ingredients + FALLBACK_PANTRY,
+        "instructions": FALLBACK_INSTRUCTIONS,
+        "calories": 400,
+        "prep_time": "30 minutes",
+        "difficulty": "Easy"
+    }
+
+def fallback_menu_analysis(menu_items: List[str]) -> dict:
+    """Fallback analysis used when the Gemini response isn't valid JSON"""
+    return {
+        "eco_analysis": FALLBACK_ECO_ANALYSIS,
+        "recommendations": FALLBACK_RECOMMENDATIONS,
+        "overall_eco_score": "yellow",
+        "menu_items_analysis": [
+            {"item": item, "eco_rating": "yellow", "suggestion": "Consider making this more sustainable"}
+            for item in menu_items
+        ]
+    }
+
+# Cap concurrent Gemini calls so batch fan-out respects the API key's rate limits
+gemini_semaphore = asyncio.Semaphore(50)
+
+# Retry settings for Gemini 429/unavailable errors
+GEMINI_MAX_RETRIES = 3
+GEMINI_BACKOFF_BASE = 1.0  # seconds, doubled per attempt plus jitter
+
+async def generate_with_retry(prompt: str, stream: bool = False):
+    """Call Gemini, retrying rate-limit/unavailable errors with backoff"""
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            return await model.generate_content_async(prompt, stream=stream)
+        except (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable):
+            if attempt == GEMINI_MAX_RETRIES:
+                raise
+            # Exponential backoff with jitter so retries don't stampede
+            await asyncio.sleep(GEMINI_BACKOFF_BASE * (2 ** attempt) + random.random())
+
+# Cache Gemini response text by prompt hash so identical requests skip the API;
+# the TTL bounds how long one response (including a bad one) keeps being served
+GEMINI_CACHE_MAX = 1024
+GEMINI_CACHE_TTL = 300.0  # seconds
+gemini_cache = {}  # sha256 of prompt -> (expiry, response text)
+gemini_inflight = {}  # sha256 of prompt -> task currently fetching that prompt
+
+async def fetch_and_cache(key: str, prompt: str) -> str:
+    """Fetch a prompt from Gemini and store the response under its cache key"""
+    async with gemini_semaphore:
+        response = await generate_with_retry(prompt)
+
+    # Evict the oldest entry once the cache is full (dicts keep insertion order)
+    if len(gemini_cache) >= GEMINI_CACHE_MAX:
+        gemini_cache.pop(next(iter(gemini_cache)))
+    gemini_cache[key] = (time.time() + GEMINI_CACHE_TTL, response.text)
+    return response.text
+
+async def generate_text(prompt: str) -> str:
+    """Call Gemini for a prompt, returning a cached response for repeat prompts"""
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+    cached = gemini_cache.get(key)
+    if cached is not None:
+        expiry, text = cached
+        if time.time() < expiry:
+            return text
+        del gemini_cache[key]
+
+    # Deduplicate concurrent misses: the first caller starts the fetch and
+    # everyone else awaits the same task instead of hitting Gemini again
+    task = gemini_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(fetch_and_cache(key, prompt))
+        gemini_inflight[key] = task
+        task.add_done_callback(lambda _: gemini_inflight.pop(key, None))
+    return await task
+
+# Traffic-light score values; Literal validation is a set lookup instead of
+# an arbitrary string check and rejects anything the frontend can't render
+Score = Literal["green", "yellow", "red"]
 
 # Pydantic models for request/response
 class IngredientRequest(BaseModel):
@@ -42,14 +193,20 @@ class MenuRequest(BaseModel):
     menu_items: List[str]
     restaurant_name: Optional[str] = None
 
+class BatchIngredientRequest(BaseModel):
+    items: List[IngredientRequest]
+
+class BatchMenuRequest(BaseModel):
+    items: List[MenuRequest]
+
 class RecipeResponse(BaseModel):
     recipe_name: str
     ingredients: List[str]
     instructions: List[str]
     calories: int
     eco_tip: str
-    eco_score: str  # "green", "yellow", "red"
-    health_score: str  # "green", "yellow", "red"
+    eco_score: Score
+    health_score: Score
     prep_time: str
     difficulty: str
 
@@ -57,39 +214,124 @@ class MenuAnalysisResponse(BaseModel):
     restaurant_name: str
     eco_analysis: str
     recommendations: List[str]
-    overall_eco_score: str
+    overall_eco_score: Score
     menu_items_analysis: List[dict]
 
-# CSV file paths for data storage
-RECIPES_CSV = "data/recipes.csv"
-MENU_ANALYSIS_CSV = "data/menu_analysis.csv"
+# SQLite database for request logging (WAL mode allows readers during appends)
+DB_PATH = "data/ecomeal.db"
+
+# Log tables and their columns
+LOG_TABLES = {
+    "recipes": [
+        "timestamp", "type", "input_ingredients", "dietary_preferences",
+        "recipe_name", "calories", "eco_score", "health_score",
+        "prep_time", "difficulty"
+    ],
+    "menu_analysis": [
+        "timestamp", "type", "restaurant_name", "menu_items",
+        "overall_eco_score", "recommendations_count"
+    ],
+}
 
 # Create data directory if it doesn't exist
 os.makedirs("data", exist_ok=True)
 
-def save_to_csv(data: dict, filename: str):
-    """Save data to CSV file"""
+def init_db():
+    """Create the log tables and enable WAL mode"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for table, columns in LOG_TABLES.items():
+        cols = ", ".join(f"{col} TEXT" for col in columns)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+    conn.commit()
+    conn.close()
+
+init_db()
+
+# Directory for bulk recipe-generation jobs; job status lives on disk
+# (input/output/error files) so any worker can answer a poll, and batch_jobs
+# only keeps running tasks alive until they finish
+BATCH_DIR = "data/batches"
+os.makedirs(BATCH_DIR, exist_ok=True)
+batch_jobs = {}  # batch_id -> running asyncio.Task, pruned on completion
+
+def batch_path(batch_id: str, suffix: str) -> str:
+    return os.path.join(BATCH_DIR, f"{batch_id}.{suffix}")
+
+# Log timestamps only need second resolution, so cache the formatted string
+# and re-render it only when the clock ticks over to a new second
+_timestamp_cache = (0, "")
+
+def now_iso() -> str:
+    global _timestamp_cache
+    second = int(time.time())
+    if second != _timestamp_cache[0]:
+        _timestamp_cache = (second, datetime.now().isoformat(timespec="seconds"))
+    return _timestamp_cache[1]
+
+# Pending log rows, flushed to SQLite by a background task
+log_buffers = {}  # table -> list of pending rows
+LOG_FLUSH_INTERVAL = 2.0  # seconds
+
+def queue_log_row(data: dict, table: str):
+    """Buffer a row in memory; the background flush task writes it to SQLite"""
+    log_buffers.setdefault(table, []).append(data)
+
+def save_rows(rows: List[dict], table: str):
+    """Insert rows into the log table in a single transaction"""
     try:
-        # Check if file exists
-        if os.path.exists(filename):
-            df = pd.read_csv(filename)
-            new_df = pd.DataFrame([data])
-            df = pd.concat([df, new_df], ignore_index=True)
-        else:
-            df = pd.DataFrame([data])
-        
-        df.to_csv(filename, index=False)
+        columns = LOG_TABLES[table]
+        placeholders = ", ".join("?" * len(columns))
+        conn = sqlite3.connect(DB_PATH)
+        # With WAL, NORMAL skips the per-commit fsync; worst case a power loss
+        # drops the last buffered batch of log rows, never corrupts the db
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executemany(
+            f"INSERT INTO {table} VALUES ({placeholders})",
+            [tuple(row.get(col) for col in columns) for row in rows]
+        )
+        conn.commit()
+        conn.close()
     except Exception as e:
-        print(f"Error saving to CSV: {e}")
+        print(f"Error saving to database: {e}")
 
-def get_eco_score(ingredients: List[str], calories: int) -> str:
+def flush_log_buffers():
+    """Write all buffered rows to their log tables"""
+    for table in list(log_buffers):
+        rows = log_buffers[table]
+        if not rows:
+            continue
+        log_buffers[table] = []
+        save_rows(rows, table)
+
+async def log_flush_loop():
+    """Periodically flush buffered log rows off the request path"""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        await asyncio.to_thread(flush_log_buffers)
+
+@app.on_event("startup")
+async def start_log_flusher():
+    app.state.log_flush_task = asyncio.create_task(log_flush_loop())
+
+@app.on_event("shutdown")
+async def stop_log_flusher():
+    app.state.log_flush_task.cancel()
+    flush_log_buffers()
+
+# Keyword lists compiled once into alternation regexes, so scoring scans
+# each ingredient list in a single pass instead of a keyword x ingredient loop
+ECO_PATTERN = re.compile("organic|local|seasonal|plant-based|sustainable")
+PROCESSED_PATTERN = re.compile("processed|packaged|frozen|canned")
+HEALTHY_PATTERN = re.compile("vegetables|fruits|whole grain|lean protein|nuts|seeds")
+UNHEALTHY_PATTERN = re.compile("sugar|sodium|saturated fat|processed")
+
+def get_eco_score(ingredients: List[str], calories: int) -> Score:
     """Determine eco score based on ingredients and calories"""
-    eco_ingredients = ["organic", "local", "seasonal", "plant-based", "sustainable"]
-    processed_ingredients = ["processed", "packaged", "frozen", "canned"]
-    
-    eco_count = sum(1 for ingredient in ingredients for eco in eco_ingredients if eco in ingredient.lower())
-    processed_count = sum(1 for ingredient in ingredients for proc in processed_ingredients if proc in ingredient.lower())
-    
+    text = "\n".join(ingredients).lower()
+    eco_count = len(ECO_PATTERN.findall(text))
+    processed_count = len(PROCESSED_PATTERN.findall(text))
+
     if eco_count > processed_count and calories < 600:
         return "green"
     elif eco_count == processed_count or 600 <= calories <= 800:
@@ -97,14 +339,12 @@ def get_eco_score(ingredients: List[str], calories: int) -> str:
     else:
         return "red"
 
-def get_health_score(calories: int, ingredients: List[str]) -> str:
+def get_health_score(calories: int, ingredients: List[str]) -> Score:
     """Determine health score based on calories and ingredients"""
-    healthy_ingredients = ["vegetables", "fruits", "whole grain", "lean protein", "nuts", "seeds"]
-    unhealthy_ingredients = ["sugar", "sodium", "saturated fat", "processed"]
-    
-    healthy_count = sum(1 for ingredient in ingredients for healthy in healthy_ingredients if healthy in ingredient.lower())
-    unhealthy_count = sum(1 for ingredient in ingredients for unhealthy in unhealthy_ingredients if unhealthy in ingredient.lower())
-    
+    text = "\n".join(ingredients).lower()
+    healthy_count = len(HEALTHY_PATTERN.findall(text))
+    unhealthy_count = len(UNHEALTHY_PATTERN.findall(text))
+
     if healthy_count > unhealthy_count and calories < 500:
         return "green"
     elif healthy_count == unhealthy_count or 500 <= calories <= 700:
@@ -112,100 +352,286 @@ def get_health_score(calories: int, ingredients: List[str]) -> str:
     else:
         return "red"
 
+def score_recipes_batch(ingredient_lists: List[List[str]], calories: List[int]):
+    """Vectorized eco/health scoring for a batch of recipes"""
+    texts = ["\n".join(ingredients).lower() for ingredients in ingredient_lists]
+    eco = np.array([len(ECO_PATTERN.findall(text)) for text in texts])
+    processed = np.array([len(PROCESSED_PATTERN.findall(text)) for text in texts])
+    healthy = np.array([len(HEALTHY_PATTERN.findall(text)) for text in texts])
+    unhealthy = np.array([len(UNHEALTHY_PATTERN.findall(text)) for text in texts])
+    cal = np.asarray(calories)
+
+    eco_scores = np.select(
+        [(eco > processed) & (cal < 600), (eco == processed) | ((cal >= 600) & (cal <= 800))],
+        ["green", "yellow"],
+        default="red"
+    )
+    health_scores = np.select(
+        [(healthy > unhealthy) & (cal < 500), (healthy == unhealthy) | ((cal >= 500) & (cal <= 700))],
+        ["green", "yellow"],
+        default="red"
+    )
+    return eco_scores.tolist(), health_scores.tolist()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "EcoMeal AI Backend is running!", "status": "healthy"}
 
+async def fetch_recipe_data(request: IngredientRequest) -> dict:
+    """Ask Gemini for a recipe and parse it, falling back on decode failure"""
+    ingredients_str = ", ".join(request.ingredients)
+    dietary_pref = f" (Dietary preferences: {request.dietary_preferences})" if request.dietary_preferences else ""
+
+    prompt = RECIPE_PROMPT_TEMPLATE.format(ingredients=ingredients_str, dietary_pref=dietary_pref)
+
+    # Generate recipe using Gemini (async so the event loop stays free)
+    response_text = await generate_text(prompt)
+
+    # Parse the response (assuming it returns JSON)
+    try:
+        return orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        return fallback_recipe(ingredients_str, request.ingredients)
+
+def build_recipe_response(request: IngredientRequest, recipe_data: dict,
+                          eco_score: Score, health_score: Score) -> RecipeResponse:
+    """Assemble the RecipeResponse and queue its log row"""
+    # Generate eco tip
+    eco_tips = [
+        "Use all parts of vegetables to reduce waste",
+        "Choose local and seasonal ingredients when possible",
+        "Compost food scraps instead of throwing them away",
+        "Store leftovers properly to extend their shelf life",
+        "Plan meals to use ingredients before they spoil"
+    ]
+    # crc32 is stable across processes/restarts, unlike the randomized hash()
+    eco_tip = eco_tips[zlib.crc32(recipe_data["recipe_name"].encode()) % len(eco_tips)]
+
+    # Create response
+    recipe_response = RecipeResponse(
+        recipe_name=recipe_data["recipe_name"],
+        ingredients=recipe_data["ingredients"],
+        instructions=recipe_data["instructions"],
+        calories=recipe_data["calories"],
+        eco_tip=eco_tip,
+        eco_score=eco_score,
+        health_score=health_score,
+        prep_time=recipe_data["prep_time"],
+        difficulty=recipe_data["difficulty"]
+    )
+
+    # Queue log row
+    save_data = {
+        "timestamp": now_iso(),
+        "type": "recipe_generation",
+        "input_ingredients": ", ".join(request.ingredients),
+        "dietary_preferences": request.dietary_preferences or "",
+        "recipe_name": recipe_response.recipe_name,
+        "calories": recipe_response.calories,
+        "eco_score": recipe_response.eco_score,
+        "health_score": recipe_response.health_score,
+        "prep_time": recipe_response.prep_time,
+        "difficulty": recipe_response.difficulty
+    }
+    queue_log_row(save_data, "recipes")
+
+    return recipe_response
+
+async def generate_recipe_core(request: IngredientRequest) -> RecipeResponse:
+    """Generate a recipe from leftover ingredients using Google Gemini AI"""
+    recipe_data = await fetch_recipe_data(request)
+    eco_score = get_eco_score(recipe_data["ingredients"], recipe_data["calories"])
+    health_score = get_health_score(recipe_data["calories"], recipe_data["ingredients"])
+    return build_recipe_response(request, recipe_data, eco_score, health_score)
+
 @app.post("/generate-recipe", response_model=RecipeResponse)
 async def generate_recipe(request: IngredientRequest):
     """
     Generate a recipe from leftover ingredients using Google Gemini AI
     """
     try:
-        # Prepare prompt for Gemini
-        ingredients_str = ", ".join(request.ingredients)
-        dietary_pref = f" (Dietary preferences: {request.dietary_preferences})" if request.dietary_preferences else ""
-        
-        prompt = f"""
-        Create a delicious recipe using these leftover ingredients: {ingredients_str}{dietary_pref}
-        
-        Please provide the response in the following JSON format:
-        {{
-            "recipe_name": "Creative recipe name",
-            "ingredients": ["list", "of", "ingredients", "needed"],
-            "instructions": ["step", "by", "step", "instructions"],
-            "calories": estimated_calories_per_serving,
-            "prep_time": "X minutes",
-            "difficulty": "Easy/Medium/Hard"
-        }}
-        
-        Make it eco-friendly and sustainable. Focus on reducing food waste and using all ingredients efficiently.
-        """
-        
-        # Generate recipe using Gemini
-        response = model.generate_content(prompt)
-        
-        # Parse the response (assuming it returns JSON)
+        return await generate_recipe_core(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating recipe: {str(e)}")
+
+@app.post("/generate-recipe-stream")
+async def generate_recipe_stream(request: IngredientRequest):
+    """
+    Stream the Gemini recipe text back as server-sent events as it is generated
+    """
+    ingredients_str = ", ".join(request.ingredients)
+    dietary_pref = f" (Dietary preferences: {request.dietary_preferences})" if request.dietary_preferences else ""
+    prompt = RECIPE_PROMPT_TEMPLATE.format(ingredients=ingredients_str, dietary_pref=dietary_pref)
+
+    async def event_stream():
         try:
-            recipe_data = json.loads(response.text)
-        except json.JSONDecodeError:
-            # Fallback if response isn't valid JSON
-            recipe_data = {
-                "recipe_name": f"Leftover {ingredients_str} Recipe",
-                "ingredients": request.ingredients + ["salt", "pepper", "olive oil"],
-                "instructions": ["Combine all ingredients", "Cook until done", "Season to taste"],
-                "calories": 400,
-                "prep_time": "30 minutes",
-                "difficulty": "Easy"
+            parts = []
+            async with gemini_semaphore:
+                response = await generate_with_retry(prompt, stream=True)
+                async for chunk in response:
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield f"data: {orjson.dumps({'text': chunk.text}).decode()}\n\n"
+
+            # Score the completed recipe and send it as the terminal event,
+            # so streaming clients get the same scores/tip as /generate-recipe
+            try:
+                recipe_data = orjson.loads("".join(parts))
+            except orjson.JSONDecodeError:
+                recipe_data = fallback_recipe(ingredients_str, request.ingredients)
+            eco_score = get_eco_score(recipe_data["ingredients"], recipe_data["calories"])
+            health_score = get_health_score(recipe_data["calories"], recipe_data["ingredients"])
+            recipe_response = build_recipe_response(request, recipe_data, eco_score, health_score)
+            scores = {
+                "eco_score": recipe_response.eco_score,
+                "health_score": recipe_response.health_score,
+                "eco_tip": recipe_response.eco_tip
             }
-        
-        # Calculate eco and health scores
-        eco_score = get_eco_score(recipe_data["ingredients"], recipe_data["calories"])
-        health_score = get_health_score(recipe_data["calories"], recipe_data["ingredients"])
-        
-        # Generate eco tip
-        eco_tips = [
-            "Use all parts of vegetables to reduce waste",
-            "Choose local and seasonal ingredients when possible",
-            "Compost food scraps instead of throwing them away",
-            "Store leftovers properly to extend their shelf life",
-            "Plan meals to use ingredients before they spoil"
-        ]
-        eco_tip = eco_tips[hash(recipe_data["recipe_name"]) % len(eco_tips)]
-        
-        # Create response
-        recipe_response = RecipeResponse(
-            recipe_name=recipe_data["recipe_name"],
-            ingredients=recipe_data["ingredients"],
-            instructions=recipe_data["instructions"],
-            calories=recipe_data["calories"],
-            eco_tip=eco_tip,
-            eco_score=eco_score,
-            health_score=health_score,
-            prep_time=recipe_data["prep_time"],
-            difficulty=recipe_data["difficulty"]
+            yield f"data: {orjson.dumps(scores).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            yield f"data: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.post("/generate-recipes-batch")
+async def generate_recipes_batch(request: BatchIngredientRequest):
+    """
+    Generate recipes for a list of ingredient sets, fanning out Gemini calls concurrently.
+    Failed items come back as {"error": ...} entries in their position instead of
+    failing the whole batch.
+    """
+    tasks = [fetch_recipe_data(item) for item in request.items]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Parsed JSON can still be the wrong shape (a list, missing keys, bad
+    # calories); treat those as per-item errors too instead of letting the
+    # scoring/response code below raise for the whole batch
+    responses = []
+    succeeded = []
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            responses.append({"error": f"Error generating recipe: {str(result)}"})
+        elif not isinstance(result, dict) or not isinstance(result.get("ingredients"), list) \
+                or not isinstance(result.get("calories"), (int, float)):
+            responses.append({"error": "Error generating recipe: model returned malformed recipe JSON"})
+        else:
+            responses.append(None)
+            succeeded.append((i, result))
+
+    # Score the successful recipes in one vectorized pass
+    if succeeded:
+        eco_scores, health_scores = score_recipes_batch(
+            [data["ingredients"] for _, data in succeeded],
+            [data["calories"] for _, data in succeeded]
         )
-        
-        # Save to CSV
-        save_data = {
-            "timestamp": datetime.now().isoformat(),
-            "type": "recipe_generation",
-            "input_ingredients": ingredients_str,
-            "dietary_preferences": request.dietary_preferences or "",
-            "recipe_name": recipe_response.recipe_name,
-            "calories": recipe_response.calories,
-            "eco_score": recipe_response.eco_score,
-            "health_score": recipe_response.health_score,
-            "prep_time": recipe_response.prep_time,
-            "difficulty": recipe_response.difficulty
-        }
-        save_to_csv(save_data, RECIPES_CSV)
-        
-        return recipe_response
-        
+        for (i, data), eco_score, health_score in zip(succeeded, eco_scores, health_scores):
+            try:
+                responses[i] = build_recipe_response(request.items[i], data, eco_score, health_score)
+            except Exception as e:
+                responses[i] = {"error": f"Error generating recipe: {str(e)}"}
+    return responses
+
+async def analyze_menu_core(request: MenuRequest) -> MenuAnalysisResponse:
+    """Analyze restaurant menu for eco-friendliness using Google Gemini AI"""
+    # Prepare prompt for Gemini
+    menu_str = ", ".join(request.menu_items)
+    restaurant_name = request.restaurant_name or "Restaurant"
+
+    prompt = MENU_PROMPT_PREFIX + menu_str + MENU_PROMPT_SUFFIX
+
+    # Generate analysis using Gemini (async so the event loop stays free)
+    response_text = await generate_text(prompt)
+
+    # Parse the response
+    try:
+        analysis_data = orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        analysis_data = fallback_menu_analysis(request.menu_items)
+
+    # Create response
+    menu_response = MenuAnalysisResponse(
+        restaurant_name=restaurant_name,
+        eco_analysis=analysis_data["eco_analysis"],
+        recommendations=analysis_data["recommendations"],
+        overall_eco_score=analysis_data["overall_eco_score"],
+        menu_items_analysis=analysis_data["menu_items_analysis"]
+    )
+
+    # Queue log row
+    save_data = {
+        "timestamp": now_iso(),
+        "type": "menu_analysis",
+        "restaurant_name": restaurant_name,
+        "menu_items": menu_str,
+        "overall_eco_score": menu_response.overall_eco_score,
+        "recommendations_count": len(menu_response.recommendations)
+    }
+    queue_log_row(save_data, "menu_analysis")
+
+    return menu_response
+
+async def run_batch_job(batch_id: str, items: List[IngredientRequest]):
+    """Run a bulk recipe job in the background and write results to JSONL"""
+    try:
+        results = await asyncio.gather(
+            *(generate_recipe_core(item) for item in items),
+            return_exceptions=True
+        )
+        # Write to a temp file and rename, so a poll never sees a partial file
+        output_path = batch_path(batch_id, "output.jsonl")
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for result in results:
+                if isinstance(result, Exception):
+                    f.write(orjson.dumps({"error": str(result)}) + b"\n")
+                else:
+                    f.write(orjson.dumps(result.model_dump()) + b"\n")
+        os.replace(tmp_path, output_path)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating recipe: {str(e)}")
+        # Record the failure on disk so polls report it instead of a 500
+        with open(batch_path(batch_id, "error"), "w") as f:
+            f.write(str(e))
+    finally:
+        batch_jobs.pop(batch_id, None)
+
+@app.post("/submit-batch")
+async def submit_batch(request: BatchIngredientRequest):
+    """
+    Submit a bulk recipe-generation job and get back a batch_id to poll
+    """
+    batch_id = uuid.uuid4().hex
+    with open(batch_path(batch_id, "input.jsonl"), "wb") as f:
+        for item in request.items:
+            f.write(orjson.dumps(item.model_dump()) + b"\n")
+
+    batch_jobs[batch_id] = asyncio.create_task(run_batch_job(batch_id, request.items))
+    return {"batch_id": batch_id, "status": "submitted", "item_count": len(request.items)}
+
+@app.get("/batch-result/{batch_id}")
+async def batch_result(batch_id: str):
+    """
+    Poll a bulk recipe-generation job and return its results once complete.
+    Status comes from the job files on disk, so any worker can answer.
+    """
+    error_path = batch_path(batch_id, "error")
+    if os.path.exists(error_path):
+        with open(error_path) as f:
+            return {"batch_id": batch_id, "status": "failed", "error": f.read()}
+
+    output_path = batch_path(batch_id, "output.jsonl")
+    if os.path.exists(output_path):
+        results = []
+        with open(output_path, "rb") as f:
+            for line in f:
+                row = orjson.loads(line)
+                results.append(row if "error" in row else RecipeResponse(**row))
+        return {"batch_id": batch_id, "status": "completed", "results": results}
+
+    if os.path.exists(batch_path(batch_id, "input.jsonl")):
+        return {"batch_id": batch_id, "status": "running"}
+    raise HTTPException(status_code=404, detail=f"Unknown batch_id: {batch_id}")
 
 @app.post("/restaurant-analysis", response_model=MenuAnalysisResponse)
 async def analyze_restaurant_menu(request: MenuRequest):
@@ -213,85 +639,37 @@ async def analyze_restaurant_menu(request: MenuRequest):
     Analyze restaurant menu for eco-friendliness using Google Gemini AI
     """
     try:
-        # Prepare prompt for Gemini
-        menu_str = ", ".join(request.menu_items)
-        restaurant_name = request.restaurant_name or "Restaurant"
-        
-        prompt = f"""
-        Analyze this restaurant menu for eco-friendliness and sustainability: {menu_str}
-        
-        Please provide the response in the following JSON format:
-        {{
-            "eco_analysis": "Overall analysis of the menu's environmental impact",
-            "recommendations": ["list", "of", "eco-friendly", "recommendations"],
-            "overall_eco_score": "green/yellow/red",
-            "menu_items_analysis": [
-                {{"item": "menu item name", "eco_rating": "green/yellow/red", "suggestion": "improvement suggestion"}},
-                {{"item": "another item", "eco_rating": "green/yellow/red", "suggestion": "improvement suggestion"}}
-            ]
-        }}
-        
-        Focus on:
-        - Local and seasonal ingredients
-        - Plant-based options
-        - Sustainable protein sources
-        - Food waste reduction
-        - Packaging and preparation methods
-        """
-        
-        # Generate analysis using Gemini
-        response = model.generate_content(prompt)
-        
-        # Parse the response
-        try:
-            analysis_data = json.loads(response.text)
-        except json.JSONDecodeError:
-            # Fallback if response isn't valid JSON
-            analysis_data = {
-                "eco_analysis": "Menu analysis completed. Consider adding more plant-based options and local ingredients.",
-                "recommendations": [
-                    "Add more plant-based options",
-                    "Source ingredients locally",
-                    "Reduce food waste through better planning",
-                    "Use sustainable packaging"
-                ],
-                "overall_eco_score": "yellow",
-                "menu_items_analysis": [
-                    {"item": item, "eco_rating": "yellow", "suggestion": "Consider making this more sustainable"} 
-                    for item in request.menu_items
-                ]
-            }
-        
-        # Create response
-        menu_response = MenuAnalysisResponse(
-            restaurant_name=restaurant_name,
-            eco_analysis=analysis_data["eco_analysis"],
-            recommendations=analysis_data["recommendations"],
-            overall_eco_score=analysis_data["overall_eco_score"],
-            menu_items_analysis=analysis_data["menu_items_analysis"]
-        )
-        
-        # Save to CSV
-        save_data = {
-            "timestamp": datetime.now().isoformat(),
-            "type": "menu_analysis",
-            "restaurant_name": restaurant_name,
-            "menu_items": menu_str,
-            "overall_eco_score": menu_response.overall_eco_score,
-            "recommendations_count": len(menu_response.recommendations)
-        }
-        save_to_csv(save_data, MENU_ANALYSIS_CSV)
-        
-        return menu_response
-        
+        return await analyze_menu_core(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing menu: {str(e)}")
 
+@app.post("/analyze-menus-batch")
+async def analyze_menus_batch(request: BatchMenuRequest):
+    """
+    Analyze a list of restaurant menus, fanning out Gemini calls concurrently.
+    Failed items come back as {"error": ...} entries in their position instead of
+    failing the whole batch.
+    """
+    tasks = [analyze_menu_core(item) for item in request.items]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return [
+        {"error": f"Error analyzing menu: {str(result)}"} if isinstance(result, BaseException) else result
+        for result in results
+    ]
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": now_iso()}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # App is passed as an import string so uvicorn can spawn multiple workers
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+    )